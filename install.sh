@@ -14,7 +14,7 @@ fi
 
 echo "🔧 Installing dependencies"
 sudo apt update
-sudo apt install -y mpv python3-gpiozero python3-pip python3-psutil python3-flask ffmpeg samba samba-common-bin
+sudo apt install -y mpv python3-gpiozero python3-lgpio python3-libgpiod python3-pip python3-aiohttp ffmpeg samba samba-common-bin
 
 # Create systemd unit file
 echo "🔧 Creating $SERVICE_PATH..."
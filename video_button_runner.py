@@ -1,116 +1,385 @@
 #!/usr/bin/env python3
-import os, time, json, socket, shutil, glob, subprocess, psutil, threading
+import os, stat, time, json, errno, socket, asyncio, selectors, shutil, signal, subprocess, threading
 from pathlib import Path
-from gpiozero import Button
-from flask import Flask, request, jsonify
+from aiohttp import web
+
+try:
+    from inotify_simple import INotify, flags as in_flags
+except ImportError:
+    INotify = None  # fall back to plain polling
+
+try:
+    # C-speed (de)serialisation for the IPC hot path; stdlib json works too
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+    def _dumps(o): return json.dumps(o).encode("utf-8")
+    _loads = json.loads
 
 # ------------------ CONFIG ------------------
 TARGET_DIR = Path.home() / "videos"   # With User=root this is /root/videos
 VIDEO_EXTS = (".mp4", ".mov", ".mkv", ".avi", ".m4v")
+_EXTS = frozenset(VIDEO_EXTS)
+USB_MOUNT = Path("/media/usb")        # Where we mount USB partitions ourselves
+USB_POLL_SEC = 5
+USB_SIG_PATH = Path("/var/lib/pi_spooky/usb_sigs.json")
 BUTTON_PIN = 24  # BCM numbering
 IPC_SOCK = "/tmp/mpv-video-sock"
 MPV = "mpv"
-MPV_BASE_ARGS = [
+MPV_BASE_ARGS = (
     MPV,
     "--fs",
     "--keep-open=always",
     "--idle=yes",
     "--no-osd-bar",
-    f"--input-ipc-server={IPC_SOCK}",
     "--really-quiet",
-]
+)
+# Hand mpv one end of a socketpair (--input-ipc-client=fd://N) so IPC is
+# live the moment it execs; the IPC_SOCK path dance only remains as the
+# fallback for mpv builds without fd:// support.
+MPV_FD_IPC = True
 API_HOST = "0.0.0.0"
 API_PORT = 8080
 # --------------------------------------------
 
-app = Flask(__name__)
+routes = web.RouteTableDef()
 
 CURRENT_MODE = "idle"      # idle | loop | triggered | custom
 CURRENT_FILE = None
 WATCHDOG_STOP = threading.Event()
 
+# Persistent mpv IPC connection. One socket stays open for the life of the
+# mpv process; a reader thread drains events so commands are a single
+# sendall instead of a connect/send/recv/close round trip each.
+_IPC_SOCK_OBJ = None
+_IPC_LOCK = threading.Lock()
+EOF_EVENT = threading.Event()
+# Written at shutdown so the reader's select() returns without waiting on
+# mpv; the socket itself stays in blocking-free select territory.
+_IPC_WAKE_R, _IPC_WAKE_W = os.pipe()
+
+# Outstanding request_ids -> [Event, response]; the reader thread fills in
+# the response mpv echoes back and sets the event.
+_PENDING = {}
+_REQ_COUNTER = [1]
+
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
 def log(msg):
     print(f"[VIDEO_RUNNER] {msg}", flush=True)
 
+MPV_PROC = None  # the mpv instance we spawned, if any
+
 def kill_existing_mpv():
+    global MPV_PROC
     if os.path.exists(IPC_SOCK):
         try: os.remove(IPC_SOCK)
         except Exception: pass
-    for p in psutil.process_iter(attrs=["name","cmdline"]):
+    if MPV_PROC is not None and MPV_PROC.poll() is None:
+        # We own this process; no need to enumerate the whole system.
+        MPV_PROC.terminate()
         try:
-            if p.info["name"] == "mpv" or (p.info["cmdline"] and "mpv" in p.info["cmdline"][0]):
-                p.terminate()
+            MPV_PROC.wait(timeout=0.5)
         except Exception:
+            MPV_PROC.kill()
+        MPV_PROC = None
+        return
+    MPV_PROC = None
+    # Stale mpv from a previous run: read just /proc/<pid>/comm per pid —
+    # one tiny file each, versus the ~5 psutil.process_iter opened — and
+    # without forking a pkill.
+    with os.scandir("/proc") as it:
+        for e in it:
+            if not e.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{e.name}/comm") as f:
+                    if f.read().rstrip("\n") == "mpv":
+                        os.kill(int(e.name), signal.SIGTERM)
+            except (OSError, ValueError):
+                pass
+
+def _ipc_reader(sock):
+    # Drains the persistent IPC socket, turning mpv property-change events
+    # into EOF_EVENT. Exits when the socket dies (mpv restart) or the wake
+    # pipe fires (shutdown). select() gates every recv, so reads never
+    # block and need no per-call timeout reconfiguration; writes elsewhere
+    # keep the plain blocking sendall.
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    sel.register(_IPC_WAKE_R, selectors.EVENT_READ)
+    buf = b""
+    while True:
+        ready = {key.fd for key, _ in sel.select()}
+        if _IPC_WAKE_R in ready:
+            os.read(_IPC_WAKE_R, 1)
+            break
+        if not ready:
+            continue
+        try:
+            data = sock.recv(4096)
+        except OSError:
+            break
+        if not data:
+            break
+        buf += data
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            try:
+                msg = _loads(line)
+            except ValueError:
+                continue
+            if (msg.get("event") == "property-change"
+                    and msg.get("name") == "eof-reached"
+                    and msg.get("data") is True):
+                EOF_EVENT.set()
+            elif msg.get("event") == "end-file" and msg.get("reason") == "eof":
+                # With --keep-open=always the eof-reached property is the
+                # usual signal, but some container/codec combinations only
+                # deliver end-file; honour both so the watchdog never waits
+                # on a video that already finished.
+                EOF_EVENT.set()
+            elif "request_id" in msg:
+                pending = _PENDING.pop(msg["request_id"], None)
+                if pending is not None:
+                    pending[1] = msg
+                    pending[0].set()
+    sel.close()
+    # Socket is gone; fail anything still waiting for a reply
+    for rid in list(_PENDING):
+        pending = _PENDING.pop(rid, None)
+        if pending is not None:
+            pending[0].set()
+
+def _ipc_attach(s):
+    global _IPC_SOCK_OBJ
+    _IPC_SOCK_OBJ = s
+    # Subscribe once; mpv pushes eof-reached changes from here on
+    s.sendall(b'{"command":["observe_property",1,"eof-reached"]}\n')
+    threading.Thread(target=_ipc_reader, args=(s,), daemon=True).start()
+
+def _ipc_connect():
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.connect(IPC_SOCK)
+    _ipc_attach(s)
+
+class _Proc:
+    # Just enough of the Popen surface (poll/wait/terminate/kill) for a
+    # child started with posix_spawn, which skips fork's copy-on-write of
+    # the whole Python heap — tens of ms on a Pi once RSS grows.
+    __slots__ = ("pid", "_status")
+
+    def __init__(self, pid):
+        self.pid = pid
+        self._status = None
+
+    def poll(self):
+        if self._status is None:
+            pid, st = os.waitpid(self.pid, os.WNOHANG)
+            if pid:
+                self._status = st
+        return self._status
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            if self._status is None:
+                _, self._status = os.waitpid(self.pid, 0)
+            return self._status
+        deadline = time.time() + timeout
+        while self.poll() is None:
+            if time.time() >= deadline:
+                raise TimeoutError(f"pid {self.pid} still running")
+            time.sleep(0.05)
+        return self._status
+
+    def _signal(self, sig):
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
             pass
-    psutil.wait_procs(psutil.process_iter(), timeout=0.1)
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(signal.SIGKILL)
+
+def _spawn_mpv(argv):
+    devnull = os.open(os.devnull, os.O_RDWR)
+    try:
+        pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=[
+            (os.POSIX_SPAWN_DUP2, devnull, 1),
+            (os.POSIX_SPAWN_DUP2, devnull, 2),
+        ])
+    finally:
+        os.close(devnull)
+    return _Proc(pid)
+
+def _probe_mpv_fd_ipc():
+    # --input-ipc-client appeared in mpv 0.29; decide the transport once
+    # at startup instead of guessing per spawn. Unparseable output (git
+    # builds etc.) falls back to the always-working socket path.
+    global MPV_FD_IPC
+    try:
+        out = subprocess.run([MPV, "--version"], capture_output=True, timeout=5).stdout
+        major, minor = out.split()[1].decode().split(".")[:2]
+        MPV_FD_IPC = (int(major), int(minor)) >= (0, 29)
+    except Exception as e:
+        log(f"mpv version probe failed ({e}); using socket-path IPC")
+        MPV_FD_IPC = False
 
 def start_mpv_idle():
+    global _IPC_SOCK_OBJ, MPV_PROC
     kill_existing_mpv()
-    proc = subprocess.Popen(MPV_BASE_ARGS, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _IPC_SOCK_OBJ = None
+    _invalidate_loaded()
+    if MPV_FD_IPC:
+        # No filesystem rendezvous: mpv gets its end of a socketpair on the
+        # command line and IPC works the instant exec returns, instead of
+        # us polling for the socket path for up to 2.5 s.
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        os.set_inheritable(child.fileno(), True)
+        proc = _spawn_mpv((*MPV_BASE_ARGS, f"--input-ipc-client=fd://{child.fileno()}"))
+        child.close()
+        MPV_PROC = proc
+        try:
+            _ipc_attach(parent)
+        except OSError as e:
+            log(f"mpv IPC attach failed: {e}")
+        return proc
+    proc = _spawn_mpv((*MPV_BASE_ARGS, f"--input-ipc-server={IPC_SOCK}"))
+    MPV_PROC = proc
     # Wait for IPC socket
     for _ in range(200):
         if os.path.exists(IPC_SOCK): break
         time.sleep(0.025)
+    try:
+        _ipc_connect()
+    except OSError as e:
+        log(f"mpv IPC connect failed: {e}")
     return proc
 
-def mpv_cmd(obj, timeout=2.0):
-    deadline = time.time() + timeout
-    last_err = None
-    while time.time() < deadline:
-        try:
-            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
-                s.connect(IPC_SOCK)
-                s.sendall((json.dumps(obj) + "\n").encode("utf-8"))
-                try:
-                    s.settimeout(0.2)
-                    _ = s.recv(4096)
-                except Exception:
-                    pass
-                return True
-        except Exception as e:
-            last_err = e
-            time.sleep(0.05)
-    if last_err:
-        log(f"mpv_cmd error: {last_err}")
-    return False
+def _ipc_send(payload):
+    s = _IPC_SOCK_OBJ
+    if s is None:
+        return False
+    try:
+        with _IPC_LOCK:
+            s.sendall(payload)
+        return True
+    except OSError as e:
+        log(f"mpv ipc send error: {e}")
+        return False
 
-def mpv_set_pause(val: bool):
-    mpv_cmd({"command":["set_property","pause", bool(val)]})
+def mpv_cmd(obj):
+    return _ipc_send(_dumps(obj) + b"\n")
 
-def mpv_get_eof_reached() -> bool:
-    req = {"command":["get_property","eof-reached"]}
-    try:
-        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
-            s.connect(IPC_SOCK)
-            s.sendall((json.dumps(req)+"\n").encode("utf-8"))
-            s.settimeout(0.2)
-            data = s.recv(4096)
-            if not data:
-                return False
-            resp = json.loads(data.decode("utf-8", errors="ignore").splitlines()[-1])
-            return bool(isinstance(resp, dict) and resp.get("data") is True)
-    except Exception:
+def mpv_cmds(*objs, confirm=False, timeout=1.0):
+    # mpv accepts newline-delimited JSON pipelined on one connection, so a
+    # batch of commands is one sendall instead of one write per command.
+    # With confirm=True the last command carries a request_id and we wait
+    # for mpv to echo it back, so the caller learns whether the batch was
+    # actually processed.
+    s = _IPC_SOCK_OBJ
+    if s is None:
+        return False
+    pending = None
+    if confirm:
+        with _IPC_LOCK:
+            rid = _REQ_COUNTER[0]
+            _REQ_COUNTER[0] += 1
+        objs[-1]["request_id"] = rid
+        pending = [threading.Event(), None]
+        _PENDING[rid] = pending
+    payload = b"".join(_dumps(o) + b"\n" for o in objs)
+    if not _ipc_send(payload):
+        if confirm:
+            _PENDING.pop(rid, None)
         return False
+    if not confirm:
+        return True
+    pending[0].wait(timeout)
+    resp = pending[1]
+    return bool(resp and resp.get("error") == "success")
+
+# Constant commands serialised once at import; pause toggles send a
+# ready-made bytes object with zero per-call encoding work.
+_PAUSE_PAYLOAD = {
+    True: _dumps({"command":["set_property","pause", True]}) + b"\n",
+    False: _dumps({"command":["set_property","pause", False]}) + b"\n",
+}
+
+def mpv_set_pause(val: bool):
+    _ipc_send(_PAUSE_PAYLOAD[bool(val)])
+
+# Path currently loaded in mpv. Replaying the same file (the normal
+# loop.mp4 <-> triggered.mp4 cycle) becomes a seek instead of a
+# loadfile-replace, which would re-demux and re-init codecs every time.
+_LOADED_FILE = None
+
+def _invalidate_loaded():
+    global _LOADED_FILE
+    _LOADED_FILE = None
 
 def loadfile(path: Path, loop_inf: bool):
     # Replace current file, set loop-file property, unpause
-    mpv_cmd({"command":["loadfile", str(path), "replace"]})
-    mpv_cmd({"command":["set_property", "loop-file", "inf" if loop_inf else "no"]})
-    mpv_set_pause(False)
+    global _LOADED_FILE
+    spath = os.fspath(path)
+    loop_cmd = {"command":["set_property", "loop-file", "inf" if loop_inf else "no"]}
+    EOF_EVENT.clear()  # stale EOF from the previous file must not fire
+    if spath == _LOADED_FILE:
+        if mpv_cmds(
+            {"command":["seek", 0, "absolute+exact"]},
+            loop_cmd,
+            {"command":["set_property", "pause", False]},
+            confirm=True,
+        ):
+            return True
+        _LOADED_FILE = None  # seek refused; fall through to a full load
+    ok = mpv_cmds(
+        {"command":["loadfile", spath, "replace"]},
+        loop_cmd,
+        {"command":["set_property", "pause", False]},
+        confirm=True,
+    )
+    _LOADED_FILE = spath if ok else None
+    return ok
+
+# Newest video in TARGET_DIR, memoized on the directory mtime so idle
+# ticks don't re-stat every file when nothing has changed.
+_PICK_CACHE = {"mtime": -1, "result": None}
+
+def pick_video_from_target():
+    try:
+        st = os.stat(TARGET_DIR)
+    except FileNotFoundError:
+        return None
+    if st.st_mtime_ns == _PICK_CACHE["mtime"]:
+        return _PICK_CACHE["result"]
+    newest, newest_m = None, -1
+    with os.scandir(TARGET_DIR) as it:
+        for e in it:
+            if e.is_file(follow_symlinks=False) and _is_video_name(e.name):
+                m = e.stat().st_mtime_ns
+                if m > newest_m:
+                    newest, newest_m = Path(e.path), m
+    _PICK_CACHE["mtime"] = st.st_mtime_ns
+    _PICK_CACHE["result"] = newest
+    return newest
 
 def play_loop():
     global CURRENT_MODE, CURRENT_FILE
     loop_path = TARGET_DIR / "loop.mp4"
-    if loop_path.exists():
+    if not loop_path.exists():
+        # No dedicated loop video: fall back to the newest one available
+        loop_path = pick_video_from_target()
+    if loop_path is not None:
         loadfile(loop_path, loop_inf=True)
         CURRENT_MODE = "loop"
         CURRENT_FILE = str(loop_path)
         log(f"Looping {loop_path}")
         return True
-    log("loop.mp4 not found")
+    log("no loop video found")
     return False
 
 def play_triggered():
@@ -125,93 +394,451 @@ def play_triggered():
     log("triggered.mp4 not found")
     return False
 
+# Resolved once: resolve() stats every path component, and TARGET_DIR
+# never moves while the service runs.
+_TARGET_PREFIX = str(TARGET_DIR.resolve()) + os.sep
+
 def play_named(name: str):
     global CURRENT_MODE, CURRENT_FILE
-    # Restrict to TARGET_DIR to avoid directory traversal
-    p = (TARGET_DIR / name).resolve()
+    # Restrict to TARGET_DIR to avoid directory traversal. normpath is
+    # pure string work; the single os.stat below covers existence and
+    # regular-file-ness in one syscall.
+    norm = os.path.normpath(os.path.join(_TARGET_PREFIX, name))
+    if not norm.startswith(_TARGET_PREFIX):
+        return False, "outside videos dir"
+    if not _is_video_name(os.path.basename(norm)):
+        return False, "missing or unsupported"
     try:
-        if not str(p).startswith(str(TARGET_DIR.resolve())):
-            return False, "outside videos dir"
-    except Exception:
-        return False, "path error"
-    if not p.exists() or p.suffix.lower() not in VIDEO_EXTS:
+        st = os.stat(norm)
+    except OSError:
         return False, "missing or unsupported"
-    loadfile(p, loop_inf=False)
+    if not stat.S_ISREG(st.st_mode):
+        return False, "missing or unsupported"
+    loadfile(Path(norm), loop_inf=False)
     CURRENT_MODE = "custom"
-    CURRENT_FILE = str(p)
-    log(f"Custom {p}")
+    CURRENT_FILE = norm
+    log(f"Custom {norm}")
     return True, "ok"
 
 def eof_watchdog():
-    # When a one-shot video ends, return to loop.mp4
+    # When a one-shot video ends, return to loop.mp4. Blocks on the event
+    # pushed by the IPC reader instead of polling mpv every 100 ms.
     while not WATCHDOG_STOP.is_set():
-        if CURRENT_MODE in ("triggered","custom") and mpv_get_eof_reached():
+        if not EOF_EVENT.wait(timeout=1.0):
+            continue
+        EOF_EVENT.clear()
+        if CURRENT_MODE in ("triggered","custom"):
             play_loop()
-        time.sleep(0.1)
+
+# ------------------ USB SYNC ------------------
+def _is_partition_name(n):
+    # sdXN covers USB mass storage; nvmeXnYpZ covers NVMe enclosures.
+    # mmcblk is deliberately excluded — that's the SD card we boot from.
+    if len(n) >= 4 and n[:2] == "sd" and n[-1].isdigit():
+        return True
+    return n.startswith("nvme") and "p" in n and n[-1].isdigit()
+
+def usb_partitions():
+    # Cheaper than glob.glob("/dev/sd*[0-9]"): one getdents, no regex
+    # compile, no per-match stat.
+    out = []
+    with os.scandir("/dev") as it:
+        for e in it:
+            if _is_partition_name(e.name):
+                out.append("/dev/" + e.name)
+    out.sort()
+    return out
+
+def _proc_mounts():
+    # One read of /proc/mounts -> {device: mountpoint}, shared across all
+    # partitions in a poll instead of re-scanning the file per device.
+    table = {}
+    try:
+        with open("/proc/mounts", "rb") as f:
+            for line in f:
+                parts = line.split(None, 2)
+                if len(parts) >= 2:
+                    table[parts[0].decode()] = parts[1].decode().replace("\\040", " ")
+    except OSError:
+        pass
+    return table
+
+def is_mounted(dev):
+    # Returns the mountpoint if dev is already mounted, else None
+    return _proc_mounts().get(dev)
+
+def mount_partition(dev, mounts=None):
+    # Returns (mountpoint, we_mounted_it)
+    mnt = (mounts or _proc_mounts()).get(dev)
+    if mnt:
+        return Path(mnt), False
+    ensure_dir(USB_MOUNT)
+    # noatime/nodiratime: scanning the stick must not dirty its inode cache
+    r = subprocess.run(["mount", "-o", "ro,noatime,nodiratime", dev, str(USB_MOUNT)],
+                       capture_output=True)
+    if r.returncode != 0:
+        return None, False
+    return USB_MOUNT, True
+
+def unmount_partition(mnt):
+    subprocess.run(["umount", str(mnt)], capture_output=True)
+
+def scan_usb_candidates(mnt):
+    return [mnt, mnt / "videos", mnt / "Videos", mnt / "media"]
+
+def _is_dir(p):
+    # One stat answers both "exists" and "is a directory"; Path.exists()
+    # plus is_dir() would pay twice per candidate.
+    try:
+        return stat.S_ISDIR(os.stat(p).st_mode)
+    except OSError:
+        return False
+
+def _is_video_name(name):
+    # rfind + slice only lowercases the extension, not the whole filename;
+    # also rejects hidden files (macOS sticks litter ._AppleDouble junk).
+    if name.startswith("."):
+        return False
+    dot = name.rfind(".")
+    return dot >= 0 and name[dot:].lower() in _EXTS
+
+def _iter_videos(d):
+    # One flat scandir of the candidate dir, no recursion:
+    # scan_usb_candidates already enumerates the interesting roots, and
+    # descending into arbitrary junk (node_modules, photo dumps...) on a
+    # slow stick costs unbounded syscalls for files we'd never copy.
+    with os.scandir(d) as it:
+        for e in it:
+            if e.is_file(follow_symlinks=False) and _is_video_name(e.name):
+                yield e
+
+# FAT32 rounds mtimes to 2 s, so compare at that granularity explicitly —
+# int(st_mtime) truncated to whole seconds, which happened to work but hid
+# the assumption and broke down for sub-second ext4-to-ext4 changes.
+_MTIME_GRAN_NS = 2_000_000_000
+
+# Snapshot of TARGET_DIR contents, rebuilt only when the directory mtime moves.
+# In the steady "nothing changed" poll this costs one stat total instead of one
+# per destination file.
+_DST_INDEX = {"mtime": -1, "entries": {}}
+
+def _target_index():
+    st = os.stat(TARGET_DIR)
+    if st.st_mtime_ns != _DST_INDEX["mtime"]:
+        entries = {}
+        with os.scandir(TARGET_DIR) as it:
+            for e in it:
+                if e.is_file(follow_symlinks=False) and _is_video_name(e.name):
+                    es = e.stat()
+                    entries[e.name] = (es.st_size, es.st_mtime_ns // _MTIME_GRAN_NS)
+        _DST_INDEX["entries"] = entries
+        _DST_INDEX["mtime"] = st.st_mtime_ns
+    return _DST_INDEX["entries"]
+
+def _invalidate_target_index():
+    _DST_INDEX["mtime"] = -1
+
+def _fast_copy(src, dst):
+    # Ship bytes kernel-to-kernel instead of bouncing them through a Python
+    # read/write loop — for multi-GB videos the userspace copy is pure
+    # memory-bandwidth waste on a Pi. copy_file_range covers same-fs (and
+    # reflinks where the fs can); sendfile covers USB-to-SD; a large-buffer
+    # copyfileobj is the last resort for exotic filesystems.
+    with open(src, "rb") as fi, open(dst, "wb") as fo:
+        size = os.fstat(fi.fileno()).st_size
+        offset = 0
+        try:
+            while offset < size:
+                n = os.copy_file_range(fi.fileno(), fo.fileno(),
+                                       size - offset, offset, offset)
+                if n == 0:
+                    break
+                offset += n
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL):
+                raise
+            fi.seek(0)
+            fo.seek(0)
+            fo.truncate()
+            try:
+                while os.sendfile(fo.fileno(), fi.fileno(), None, 8 * 1024 * 1024):
+                    pass
+            except OSError:
+                fi.seek(0)
+                fo.seek(0)
+                fo.truncate()
+                shutil.copyfileobj(fi, fo, length=1 << 20)
+    shutil.copystat(src, dst)  # preserve mtime so the dedup check still works
+
+def _needs_copy(entry, dst_index):
+    sstat = entry.stat()  # cached by scandir, no extra syscall
+    return dst_index.get(entry.name) != (sstat.st_size, sstat.st_mtime_ns // _MTIME_GRAN_NS)
+
+def sync_new_videos(src_dir):
+    # Single pass: compare against the target index and copy in the same
+    # walk. The old dry-run (would_copy_new_videos) plus copy pair
+    # traversed and stat'd the source twice for no benefit.
+    copied = 0
+    if not _is_dir(src_dir):
+        return copied
+    dst_index = _target_index()
+    for e in _iter_videos(src_dir):
+        if _needs_copy(e, dst_index):
+            dst = TARGET_DIR / e.name
+            log(f"Copying {e.path} -> {dst}")
+            _fast_copy(e.path, dst)
+            copied += 1
+    if copied:
+        _invalidate_target_index()
+        _invalidate_loaded()  # a copied file may be the one mpv has open
+    return copied
+
+# Composite signature (count, newest mtime, total size folded into one int)
+# per USB candidate dir, persisted across restarts. The dominant case for
+# this prop is "same stick left plugged in, nothing changed" — a matching
+# signature skips the file-by-file comparison entirely.
+def _dir_signature(d):
+    cnt = mx = tot = 0
+    for e in _iter_videos(d):
+        st = e.stat()
+        cnt += 1
+        tot += st.st_size
+        if st.st_mtime_ns > mx:
+            mx = st.st_mtime_ns
+    return (cnt << 40) ^ mx ^ tot
+
+def _load_usb_sigs():
+    try:
+        return json.loads(USB_SIG_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def _save_usb_sigs(sigs):
+    try:
+        ensure_dir(USB_SIG_PATH.parent)
+        USB_SIG_PATH.write_text(json.dumps(sigs))
+    except OSError as e:
+        log(f"usb sig cache write failed: {e}")
+
+def check_usb_for_updates():
+    copied = 0
+    mounts = _proc_mounts()
+    sigs = _load_usb_sigs()
+    sigs_dirty = False
+    for dev in usb_partitions():
+        mnt, we_mounted = mount_partition(dev, mounts)
+        if mnt is None:
+            log(f"mount failed for {dev}")
+            continue
+        try:
+            for cand in scan_usb_candidates(mnt):
+                if not _is_dir(cand):
+                    continue
+                key = f"{dev}:{cand.relative_to(mnt)}"
+                sig = _dir_signature(cand)
+                if sigs.get(key) == sig:
+                    continue
+                copied += sync_new_videos(cand)
+                sigs[key] = sig
+                sigs_dirty = True
+        finally:
+            if we_mounted:
+                unmount_partition(mnt)
+    if sigs_dirty:
+        _save_usb_sigs(sigs)
+    return copied
+
+def _usb_inotify():
+    # Watch /dev for partition hotplug, /media for new mounts, and
+    # TARGET_DIR for finished writes (e.g. videos dropped over the Samba
+    # share). Between them every way videos can arrive raises an event.
+    ino = INotify()
+    dev_wd = ino.add_watch("/dev", in_flags.CREATE | in_flags.DELETE)
+    ino.add_watch("/media", in_flags.CREATE | in_flags.MOVED_TO)
+    ino.add_watch(str(TARGET_DIR), in_flags.CLOSE_WRITE | in_flags.MOVED_TO)
+    return ino, dev_wd
+
+def _relevant_usb_event(events, dev_wd):
+    # /dev is chatty (ttys, ptys...); only wake the scanner for block
+    # partitions there. Events on /media or TARGET_DIR always count.
+    for ev in events:
+        if ev.wd != dev_wd:
+            return True
+        if _is_partition_name(ev.name):
+            return True
+    return False
+
+def usb_watcher():
+    ino = dev_wd = None
+    if INotify is not None:
+        try:
+            ino, dev_wd = _usb_inotify()
+        except OSError as e:
+            log(f"inotify unavailable, polling instead: {e}")
+            ino = None
+    while not WATCHDOG_STOP.is_set():
+        try:
+            if check_usb_for_updates() and CURRENT_MODE in ("idle", "loop"):
+                play_loop()
+        except Exception as e:
+            log(f"usb check error: {e}")
+        if ino is not None:
+            # Block until an insertion/mount/write happens; the long
+            # timeout is only a belt-and-braces rescan.
+            while True:
+                events = ino.read(timeout=300_000)
+                if not events or _relevant_usb_event(events, dev_wd):
+                    break
+        else:
+            WATCHDOG_STOP.wait(USB_POLL_SEC)
+# ----------------------------------------------
 
 # ------------------ GPIO ------------------
+def _gpiod_button_watcher(line):
+    # Blocking event_wait on the GPIO character device — a single kernel
+    # wait per press, no polling thread underneath.
+    last = 0.0
+    while not WATCHDOG_STOP.is_set():
+        if not line.event_wait(sec=3600):
+            continue
+        line.event_read()
+        now = time.monotonic()
+        if now - last >= 0.05:  # debounce, same window as the Button config
+            last = now
+            play_triggered()
+
+def _setup_button_gpiod():
+    import gpiod
+    chip = gpiod.Chip("gpiochip0")
+    line = chip.get_line(BUTTON_PIN)
+    line.request(consumer="video-button",
+                 type=gpiod.LINE_REQ_EV_FALLING_EDGE,
+                 flags=gpiod.LINE_REQ_FLAG_BIAS_PULL_UP)
+    threading.Thread(target=_gpiod_button_watcher, args=(line,), daemon=True).start()
+    log("button via gpiod character device")
+    return line
+
 def setup_button():
-    btn = Button(BUTTON_PIN, pull_up=True, bounce_time=0.05)
-    btn.when_pressed = lambda: play_triggered()
-    return btn
+    # libgpiod talks to the chardev directly with no wrapper layers; fall
+    # back to gpiozero (v2 bindings have a different API and land in the
+    # except too — gpiozero's lgpio factory is nearly as cheap there).
+    try:
+        return _setup_button_gpiod()
+    except Exception as e:
+        log(f"gpiod unavailable ({e}); using gpiozero")
+    return _setup_button_gpiozero()
+
+def _setup_button_gpiozero():
+    # Imported here rather than at module top: gpiozero pulls in a large
+    # pin-factory stack, and deferring it lets mpv reach the first frame
+    # before we pay that cost.
+    #
+    # Prefer lgpio, then pigpio: both wait on kernel edge interrupts,
+    # whereas gpiozero's native fallback spin-polls the pin from a Python
+    # thread and burns double-digit CPU on small Pis.
+    import warnings
+    from gpiozero import Button, Device
+    last_err = None
+    for factory in ("lgpio", "pigpio", None):
+        if factory is None:
+            os.environ.pop("GPIOZERO_PIN_FACTORY", None)
+        else:
+            os.environ["GPIOZERO_PIN_FACTORY"] = factory
+        Device.pin_factory = None  # force re-resolution with the new hint
+        try:
+            btn = Button(BUTTON_PIN, pull_up=True, bounce_time=0.05)
+        except Exception as e:
+            last_err = e
+            continue
+        if factory is None:
+            warnings.warn("lgpio/pigpio unavailable; gpiozero's default pin "
+                          "factory may spin-poll the button (install python3-lgpio)")
+        btn.when_pressed = lambda: play_triggered()
+        return btn
+    raise last_err
 # ------------------------------------------
 
 # ------------------ API -------------------
-@app.get("/status")
-def api_status():
-    return jsonify({"mode": CURRENT_MODE, "file": CURRENT_FILE})
+@routes.get("/status")
+async def api_status(request):
+    return web.json_response({"mode": CURRENT_MODE, "file": CURRENT_FILE})
 
-@app.post("/trigger")
-@app.get("/trigger")
-def api_trigger():
+@routes.post("/trigger")
+@routes.get("/trigger")
+async def api_trigger(request):
     ok = play_triggered()
-    return jsonify({"ok": ok, "mode": CURRENT_MODE, "file": CURRENT_FILE}), (200 if ok else 404)
+    return web.json_response({"ok": ok, "mode": CURRENT_MODE, "file": CURRENT_FILE},
+                             status=(200 if ok else 404))
 
-@app.post("/loop")
-@app.get("/loop")
-def api_loop():
+@routes.post("/loop")
+@routes.get("/loop")
+async def api_loop(request):
     ok = play_loop()
-    return jsonify({"ok": ok, "mode": CURRENT_MODE, "file": CURRENT_FILE}), (200 if ok else 404)
+    return web.json_response({"ok": ok, "mode": CURRENT_MODE, "file": CURRENT_FILE},
+                             status=(200 if ok else 404))
 
-@app.post("/play")
-@app.get("/play")
-def api_play():
+@routes.post("/play")
+@routes.get("/play")
+async def api_play(request):
     # name via querystring or JSON {"name": "..."}
-    name = request.args.get("name")
-    if not name and request.is_json:
-        name = (request.get_json(silent=True) or {}).get("name")
+    name = request.query.get("name")
+    if not name and request.content_type == "application/json":
+        try:
+            name = (await request.json()).get("name")
+        except ValueError:
+            name = None
     if not name:
-        return jsonify({"ok": False, "error": "name required"}), 400
+        return web.json_response({"ok": False, "error": "name required"}, status=400)
     ok, msg = play_named(name)
-    return jsonify({"ok": ok, "message": msg, "mode": CURRENT_MODE, "file": CURRENT_FILE}), (200 if ok else 404)
+    return web.json_response({"ok": ok, "message": msg, "mode": CURRENT_MODE, "file": CURRENT_FILE},
+                             status=(200 if ok else 404))
+
+def run_api():
+    # One asyncio loop in one daemon thread serves every request —
+    # no per-request Werkzeug threads contending on the GIL with the
+    # IPC reader and GPIO callbacks. Handlers only do short sendalls
+    # on the mpv socket, so they don't need executor offload.
+    async def serve():
+        app = web.Application()
+        app.add_routes(routes)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, API_HOST, API_PORT)
+        await site.start()
+        await asyncio.Event().wait()  # serve forever
+    asyncio.run(serve())
 # ------------------------------------------
 
 def main():
     ensure_dir(TARGET_DIR)
     # Start mpv idle with IPC
+    _probe_mpv_fd_ipc()
     mpv_proc = start_mpv_idle()
     # Start looping ASAP if available
     play_loop()
     # Start watchdog
     t = threading.Thread(target=eof_watchdog, daemon=True)
     t.start()
+    # Watch for USB drives with new videos
+    threading.Thread(target=usb_watcher, daemon=True).start()
     # Setup GPIO
     _btn = setup_button()
     # Start API
-    threading.Thread(target=lambda: app.run(host=API_HOST, port=API_PORT, threaded=True), daemon=True).start()
-    # Keep the service alive
+    threading.Thread(target=run_api, daemon=True).start()
+    # Keep the service alive. The button is edge-driven (when_pressed) and
+    # EOF arrives as an IPC event, so the only thing left to watch is the
+    # mpv process itself — block in wait() rather than waking every second.
     try:
         while True:
-            time.sleep(1)
-            # If mpv crashed, respawn and resume loop
-            if mpv_proc.poll() is not None:
-                log("mpv exited; restarting")
-                mpv_proc = start_mpv_idle()
-                play_loop()
+            mpv_proc.wait()
+            log("mpv exited; restarting")
+            mpv_proc = start_mpv_idle()
+            play_loop()
     except KeyboardInterrupt:
         pass
     finally:
         WATCHDOG_STOP.set()
+        os.write(_IPC_WAKE_W, b"x")  # unblock the IPC reader
 
 if __name__ == "__main__":
     main()